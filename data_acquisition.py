@@ -1,81 +1,191 @@
+import selectors
 import serial
 import threading
-import queue
-import json
 
-class DataAcquisition(threading.Thread):
+try:
+    # Closing a port the OS already dropped (e.g. unplugged) raises termios.error on POSIX
+    import termios
+    _CLOSE_ERRORS = (serial.SerialException, OSError, termios.error)
+except ImportError:
+    _CLOSE_ERRORS = (serial.SerialException, OSError)
+
+try:
+    # orjson parses the raw bytes straight into Python objects, much faster than stdlib json
+    import orjson as _json
+except ImportError:
+    import json as _json
+
+
+class JsonFramer:
+    """
+    Splits a raw byte stream into complete top-level JSON objects by tracking
+    curly brace depth. Bytes outside of any object are dropped.
+    bytes.find jumps straight from brace to brace, so only the braces
+    themselves cost Python-level work.
     """
-    Reads data from the serial port and accumulates curly braces to parse
-    JSON objects. If the buffer grows too large (no closing brace found),
-    we discard and log a warning to avoid indefinite growth.
+    def __init__(self):
+        self.buffer = bytearray()
+        self.brace_level = 0
+
+    def reset(self):
+        self.buffer = bytearray()
+        self.brace_level = 0
+
+    def feed(self, chunk):
+        """Consume a chunk of bytes and return a list of complete JSON objects (as bytes)."""
+        objects = []
+        i = 0
+        while True:
+            open_pos = chunk.find(b'{', i)
+            close_pos = chunk.find(b'}', i)
+
+            if open_pos == -1 and close_pos == -1:
+                # No more braces in this chunk, keep the tail if we're inside an object
+                if self.brace_level > 0:
+                    self.buffer += chunk[i:]
+                break
+
+            is_open = close_pos == -1 or (open_pos != -1 and open_pos < close_pos)
+            pos = open_pos if is_open else close_pos
+
+            if self.brace_level > 0:
+                self.buffer += chunk[i:pos + 1]
+            elif is_open:
+                # A new JSON object starts here, anything before it is noise
+                self.buffer = bytearray(chunk[pos:pos + 1])
+            # else: stray '}' outside of any object, skip it
+            i = pos + 1
+
+            if is_open:
+                self.brace_level += 1
+            elif self.brace_level > 0:
+                self.brace_level -= 1
+
+                # If we've closed all braces, we have a complete JSON
+                if self.brace_level == 0:
+                    objects.append(bytes(self.buffer))
+                    self.buffer = bytearray()
+        return objects
+
+
+class MultiPortAcquisition(threading.Thread):
+    """
+    Reads data from several serial ports in a single thread and accumulates
+    curly braces (one JsonFramer per port) to parse JSON objects. The ports
+    are opened non-blocking and serviced through a selector, so we only wake
+    up when one of them actually has bytes. If a port's buffer grows too large
+    (no closing brace found), we discard and log a warning to avoid
+    indefinite growth.
+
+    Parsed objects are appended to data_queue (a collections.deque) and
+    data_ready (a threading.Event), if given, is set to wake the consumer.
+    If id_keys is given, objects that mention none of those keys are dropped
+    without being parsed.
     """
-    def __init__(self, port, baudrate, data_queue, name="DataAcqThread", max_buffer_len=16000):
+    READ_CHUNK = 4096
+
+    def __init__(self, ports, baudrate, data_queue, data_ready=None, id_keys=None,
+                 name="DataAcqThread", max_buffer_len=16000):
         super().__init__(name=name)
-        self.port = port
+        self.ports = list(ports)
         self.baudrate = baudrate
         self.data_queue = data_queue
+        self.data_ready = data_ready
         self._stop_event = threading.Event()
-        self.serial_conn = None
+        self.serial_conns = {}  # { port: serial.Serial }
+
+        # Raw '"Key"' byte patterns, searched for before paying for a parse
+        self._id_patterns = tuple(f'"{key}"'.encode() for key in id_keys) if id_keys else ()
 
 
-        # Maximum characters we'll buffer before giving up on the current JSON
+        # Maximum bytes we'll buffer (per port) before giving up on the current JSON
         self.MAX_BUFFER_LEN = max_buffer_len
 
+    def _open_ports(self, selector):
+        for port in self.ports:
+            try:
+                conn = serial.Serial(port, self.baudrate, timeout=0)
+            except serial.SerialException as e:
+                print(f"[{self.name}] Serial exception on {port}: {e}")
+                continue
+
+            try:
+                # FTDI / CDC-ACM: don't let the driver sit on small packets
+                conn.set_low_latency_mode(True)
+            except (AttributeError, NotImplementedError, OSError, ValueError):
+                pass
+
+            self.serial_conns[port] = conn
+            selector.register(conn, selectors.EVENT_READ, (port, JsonFramer()))
+            print(f"[{self.name}] Connected on {port}")
+
+    def _close_port(self, port):
+        """Flush and close 'port', if still open. A dead port must not stop the others from closing."""
+        conn = self.serial_conns.pop(port, None)
+        if conn is None or not conn.is_open:
+            return
+        try:
+            conn.flush()
+        except _CLOSE_ERRORS as e:
+            print(f"[{self.name}] Error flushing {port}: {e}")
+        try:
+            conn.close()
+            print(f"[{self.name}] Closed {port}")
+        except _CLOSE_ERRORS as e:
+            print(f"[{self.name}] Error closing {port}: {e}")
+
+    def _handle_chunk(self, port, framer, chunk):
+        """Frame and parse one chunk from 'port'. Returns True if anything was queued."""
+        queued = False
+        for obj in framer.feed(chunk):
+            if self._id_patterns and not any(p in obj for p in self._id_patterns):
+                continue
+            try:
+                data = _json.loads(obj)
+                data["__port__"] = port
+                self.data_queue.append(data)
+                queued = True
+            except ValueError:
+                print("[WARN] Failed to decode JSON, discarding buffer.")
+
+        # Check if buffer is getting too large
+        if len(framer.buffer) > self.MAX_BUFFER_LEN:
+            print("[WARN] JSON buffer exceeded max length, discarding..."
+                  + framer.buffer.decode("utf-8", errors="ignore"))
+            framer.reset()
+
+        return queued
+
     def run(self):
+        selector = selectors.DefaultSelector()
         try:
-            self.serial_conn = serial.Serial(self.port, self.baudrate, timeout=1)
-
-            print(f"[{self.name}] Connected on {self.port}")
-
-            buffer = ""
-            brace_level = 0
-
-            while not self._stop_event.is_set():
-                # Read a line (JSON may span multiple lines, so we parse char-by-char)
-                line = self.serial_conn.readline().decode("utf-8", errors="ignore")
-                if not line:
-                    continue
-
-                for char in line:
-                    if char == '{':
-                        # If this is a new JSON object, reset buffer
-                        if brace_level == 0:
-                            buffer = ""
-                        brace_level += 1
-                        buffer += char
-
-                    elif char == '}':
-                        brace_level -= 1
-                        buffer += char
-
-                        # If we've closed all braces, we have a complete JSON
-                        if brace_level == 0:
-                            try:
-                                data = json.loads(buffer)
-                                data["__port__"] = self.port
-                                self.data_queue.put(data)
-                            except json.JSONDecodeError:
-                                print("[WARN] Failed to decode JSON, discarding buffer.")
-                            buffer = ""  # reset buffer for the next potential object
-
-                    else:
-                        # If we're inside a JSON object, accumulate
-                        if brace_level > 0:
-                            buffer += char
-
-                            # Check if buffer is getting too large
-                            if len(buffer) > self.MAX_BUFFER_LEN:
-                                print("[WARN] JSON buffer exceeded max length, discarding..." + buffer)
-                                buffer = ""
-                                brace_level = 0
-
-        except serial.SerialException as e:
-            print(f"[{self.name}] Serial exception on {self.port}: {e}")
+            self._open_ports(selector)
+
+            while not self._stop_event.is_set() and selector.get_map():
+                queued = False
+                for key, _ in selector.select(timeout=0.5):
+                    port, framer = key.data
+                    try:
+                        # Non-blocking: returns whatever is waiting, up to READ_CHUNK bytes.
+                        # JSON may span several reads, the framer keeps the partial object between them.
+                        chunk = key.fileobj.read(self.READ_CHUNK)
+                    except serial.SerialException as e:
+                        print(f"[{self.name}] Serial exception on {port}: {e}")
+                        selector.unregister(key.fileobj)
+                        self._close_port(port)
+                        continue
+
+                    if chunk:
+                        queued |= self._handle_chunk(port, framer, chunk)
+
+                # One wake-up per pass rather than per object
+                if queued and self.data_ready is not None:
+                    self.data_ready.set()
+
         finally:
-            if self.serial_conn and self.serial_conn.is_open:
-                self.serial_conn.flush()
-                self.serial_conn.close()
-                print(f"[{self.name}] Closed {self.port}")
+            selector.close()
+            for port in list(self.serial_conns):
+                self._close_port(port)
 
     def stop(self):
         self._stop_event.set()
@@ -1,8 +1,41 @@
+import logging
+import re
+import sys
 import threading
-from collections import deque
+from collections import OrderedDict
+import numpy as np
+
+try:
+    # Optional: compiles the per-frame CSI copy, skipping NumPy's generic indexing dispatch
+    from numba import njit
+except ImportError:
+    njit = None
+
+__all__ = ["DeviceStatus", "MAX_CSI_FRAMES", "N_SUBCARRIERS", "MASTER_ID"]
+
+log = logging.getLogger(__name__)
 
 MAX_CSI_FRAMES = 300
-MASTER_ID = "E8:9C:25:06:E9:80"  # Adjust if your master MAC is different
+MAX_SYNC_HISTORY = 1024  # Recent master syncs kept for slaves to match against
+N_SUBCARRIERS = 384  # Longest CSI buffer the ESP32 reports (LLTF + HT-LTF + STBC HT-LTF)
+MASTER_ID = sys.intern("E8:9C:25:06:E9:80")  # Adjust if your master MAC is different
+
+# Fail fast on a typo, otherwise no device is ever treated as master and offsets stay 0
+assert re.fullmatch(r"[0-9A-Fa-f]{2}(:[0-9A-Fa-f]{2}){5}", MASTER_ID), \
+    f"MASTER_ID must be a MAC address like AA:BB:CC:DD:EE:FF, got {MASTER_ID!r}"
+
+
+def _write_csi(ring, head, csi):
+    """Copy one CSI frame into row 'head' of the ring, zero-padding the rest. Returns the width written."""
+    n = min(csi.shape[0], ring.shape[1])
+    ring[head, :n] = csi[:n]
+    ring[head, n:] = 0  # Zero-pad shorter frames (clears the frame we overwrite)
+    return n
+
+
+if njit is not None:
+    _write_csi = njit(cache=True, boundscheck=False)(_write_csi)
+
 
 class DeviceStatus:
     def __init__(self):
@@ -10,16 +43,34 @@ class DeviceStatus:
         self.lock = threading.Lock()
 
         # For the master, we keep a dict of sync_count -> master_timestamp
-        # so slaves can find the matching sync and compute offset
-        self.master_sync_history = {}
+        # so slaves can find the matching sync and compute offset.
+        # Oldest entries are evicted once MAX_SYNC_HISTORY is reached.
+        self.master_sync_history = OrderedDict()
+
+        # Notified after updates while someone is blocked in wait_for_csi()
+        self._csi_ready = threading.Condition(self.lock)
+        self._csi_waiters = 0
 
     def _ensure_device_exists(self, device_id):
-        if device_id not in self.devices:
-            self.devices[device_id] = {
+        """Return the record for device_id, creating it on first sight."""
+        dev = self.devices.get(device_id)
+        if dev is None:
+            # Interned once here, so the master check can compare by identity
+            device_id = sys.intern(device_id)
+            dev = self.devices[device_id] = {
+                "ID": device_id,
                 "RSSI": None,
-                # Instead of storing just a list for 'CSI', we store
-                # a deque of dicts: [{"Timestamp": ..., "CSI": [...]}, ...]
-                "CSI": deque(maxlen=MAX_CSI_FRAMES),
+                # CSI is kept in a preallocated ring buffer: one row per frame,
+                # plus a matching array of (offset-adjusted) timestamps.
+                # CSIHead is the next row to write, CSIWidth the longest frame seen.
+                # CSITotal counts every frame ever written, so the oldest frame
+                # still held has absolute index CSITotal - CSICount.
+                "CSI": np.zeros((MAX_CSI_FRAMES, N_SUBCARRIERS), dtype=np.int8),
+                "CSITimestamps": np.zeros(MAX_CSI_FRAMES, dtype=np.int64),
+                "CSIHead": 0,
+                "CSICount": 0,
+                "CSITotal": 0,
+                "CSIWidth": 0,
 
                 "IPAddress": None,
                 "Gateway": None,
@@ -31,75 +82,167 @@ class DeviceStatus:
                 "LastSyncTimestamp": None,
                 "Offset": 0  # This device’s offset to MASTER’s clock
             }
+        return dev
 
     def update_device(self, device_id, data):
         with self.lock:
-            self._ensure_device_exists(device_id)
-            dev = self.devices[device_id]
-
-            # 1) Handle Sync data (Master vs. Slave)
-            if "SyncCount" in data and "Timestamp" in data:
-                sync_count = data["SyncCount"]
-                ts = data["Timestamp"]
-
-                if device_id == MASTER_ID:
-                    # Master device => record in master_sync_history
-                    self.master_sync_history[sync_count] = ts
-                    dev["SyncCount"] = sync_count
-                    dev["LastSyncTimestamp"] = ts
+            self._update_locked(device_id, data)
+            if self._csi_waiters:
+                self._csi_ready.notify_all()
+
+    def update_batch(self, items):
+        """Apply a list of (device_id, data) updates under a single lock acquisition."""
+        with self.lock:
+            for device_id, data in items:
+                self._update_locked(device_id, data)
+            if self._csi_waiters:
+                self._csi_ready.notify_all()
+
+    def wait_for_csi(self, device_ids, min_frames, timeout=None):
+        """
+        Block until every device in device_ids has at least min_frames CSI frames.
+        Returns False if the timeout expired first.
+        """
+        def enough():
+            return all(
+                d_id in self.devices and self.devices[d_id]["CSICount"] >= min_frames
+                for d_id in device_ids
+            )
+
+        with self._csi_ready:
+            self._csi_waiters += 1
+            try:
+                return self._csi_ready.wait_for(enough, timeout)
+            finally:
+                self._csi_waiters -= 1
+
+    def _update_locked(self, device_id, data):
+        # Caller must hold self.lock
+        dev = self._ensure_device_exists(device_id)
+
+        # 1) Handle Sync data (Master vs. Slave)
+        if "SyncCount" in data and "Timestamp" in data:
+            sync_count = data["SyncCount"]
+            ts = data["Timestamp"]
+
+            if dev["ID"] is MASTER_ID:
+                # Master device => record in master_sync_history
+                history = self.master_sync_history
+                if sync_count not in history and len(history) >= MAX_SYNC_HISTORY:
+                    history.popitem(last=False)
+                history[sync_count] = ts
+                # A repeated count (master reboot / counter restart) is the newest entry again
+                history.move_to_end(sync_count)
+                dev["SyncCount"] = sync_count
+                dev["LastSyncTimestamp"] = ts
+            else:
+                # Slave device => see if Master has same sync_count
+                dev["SyncCount"] = sync_count
+                dev["LastSyncTimestamp"] = ts
+
+                if sync_count in self.master_sync_history:
+                    master_ts = self.master_sync_history[sync_count]
+                    offset = master_ts - ts
+                    old_offset = dev["Offset"]
+                    dev["Offset"] = offset
+                    log.debug("%s offset now: %s", device_id, offset)
+                    if abs(offset - old_offset) > 1_000_000:
+                        print(f"[WARN] {device_id}: Offset changed by "
+                              f"{offset - old_offset} us (now {offset})")
                 else:
-                    # Slave device => see if Master has same sync_count
-                    dev["SyncCount"] = sync_count
-                    dev["LastSyncTimestamp"] = ts
-
-                    if sync_count in self.master_sync_history:
-                        master_ts = self.master_sync_history[sync_count]
-                        offset = master_ts - ts
-                        old_offset = dev["Offset"]
-                        dev["Offset"] = offset
-                        print(f"[DEBUG] {device_id} offset now: {offset}")
-                        if abs(offset - old_offset) > 1_000_000:
-                            print(f"[WARN] {device_id}: Offset changed by "
-                                  f"{offset - old_offset} us (now {offset})")
-                    else:
-                        # No matching master sync_count yet
-                        pass
-
-            # 2) Adjust any incoming Timestamp by the device's offset (if it exists)
-            if "Timestamp" in data:
-                data["Timestamp"] = data["Timestamp"] + dev["Offset"]
-
-            # 3) Update RSSI if present
-            if "RSSI" in data:
-                dev["RSSI"] = data["RSSI"]
-
-            # 4) If CSI is present, store {"Timestamp":..., "CSI":[...]} in the deque
-            if "CSI" in data and isinstance(data["CSI"], list):
-                # We'll store the already-offset timestamp (or None if not provided)
-                csi_ts = data.get("Timestamp", None)
-                csi_entry = {
-                    "Timestamp": csi_ts,
-                    "CSI": data["CSI"]
-                }
-                dev["CSI"].append(csi_entry)
+                    # No matching master sync_count yet
+                    pass
+
+        # 2) Adjust any incoming Timestamp by the device's offset (if it exists)
+        if "Timestamp" in data:
+            data["Timestamp"] = data["Timestamp"] + dev["Offset"]
+
+        # 3) Update RSSI if present
+        if "RSSI" in data:
+            dev["RSSI"] = data["RSSI"]
 
-                curr_size = len(dev["CSI"])
-                #if curr_size < MAX_CSI_FRAMES:
-                    #print(f"[DEBUG] Device {device_id}: CSI buffer size = {curr_size}/{MAX_CSI_FRAMES}")
-                #else:
-                    #print(f"[DEBUG] Device {device_id}: CSI buffer FULL at {MAX_CSI_FRAMES}!")
+        # 4) If CSI is present, write it (and its timestamp) into the ring buffer
+        if "CSI" in data and isinstance(data["CSI"], list):
+            try:
+                csi = np.asarray(data["CSI"], dtype=np.int8)
+            except (OverflowError, TypeError, ValueError):
+                csi = None
+            if csi is None or csi.ndim != 1:
+                # e.g. nulls, out-of-range values or nested lists
+                print(f"[WARN] {device_id}: Malformed CSI frame, discarding.")
+                csi = None
 
-            # 5) IP & memory fields if present
-            for key in ["IPAddress", "Gateway", "Netmask", "FreeHeap", "FreeInternalHeap"]:
-                if key in data:
-                    dev[key] = data[key]
+            if csi is not None:
+                head = dev["CSIHead"]
+                n = _write_csi(dev["CSI"], head, csi)
+
+                # We'll store the already-offset timestamp (or 0 if not provided)
+                dev["CSITimestamps"][head] = data.get("Timestamp") or 0
+                dev["CSIHead"] = (head + 1) % MAX_CSI_FRAMES
+                dev["CSICount"] = min(dev["CSICount"] + 1, MAX_CSI_FRAMES)
+                dev["CSITotal"] += 1
+                dev["CSIWidth"] = max(dev["CSIWidth"], n)
+
+        # 5) IP & memory fields if present
+        for key in ["IPAddress", "Gateway", "Netmask", "FreeHeap", "FreeInternalHeap"]:
+            if key in data:
+                dev[key] = data[key]
+
+    @staticmethod
+    def _csi_in_order(dev):
+        """
+        Copy the ring buffer out oldest-first.
+        Returns (csi, timestamps) with shapes (#frames, CSIWidth) and (#frames,).
+        """
+        count, head, width = dev["CSICount"], dev["CSIHead"], dev["CSIWidth"]
+        if count < MAX_CSI_FRAMES:
+            # Not wrapped yet, frames are already in order
+            return dev["CSI"][:count, :width].copy(), dev["CSITimestamps"][:count].copy()
+
+        csi = np.concatenate((dev["CSI"][head:, :width], dev["CSI"][:head, :width]))
+        timestamps = np.concatenate((dev["CSITimestamps"][head:], dev["CSITimestamps"][:head]))
+        return csi, timestamps
+
+    def snapshot(self):
+        """
+        Cheap snapshot: scalar fields are copied, but CSI / CSITimestamps are
+        read-only views into the live ring buffers (rows are in write order,
+        CSIHead is the oldest row once CSICount reaches MAX_CSI_FRAMES).
+        Newer frames keep overwriting those rows, so use get_all_devices()
+        when you need a consistent, chronological copy of the CSI history.
+        """
+        with self.lock:
+            snapshot = {}
+            for d_id, vals in self.devices.items():
+                csi = vals["CSI"][:, :vals["CSIWidth"]].view()
+                csi.flags.writeable = False
+                csi_timestamps = vals["CSITimestamps"].view()
+                csi_timestamps.flags.writeable = False
+
+                snapshot[d_id] = {
+                    "RSSI": vals["RSSI"],
+                    "IPAddress": vals["IPAddress"],
+                    "Gateway": vals["Gateway"],
+                    "Netmask": vals["Netmask"],
+                    "FreeHeap": vals["FreeHeap"],
+                    "FreeInternalHeap": vals["FreeInternalHeap"],
+                    "SyncCount": vals["SyncCount"],
+                    "LastSyncTimestamp": vals["LastSyncTimestamp"],
+                    "Offset": vals["Offset"],
+                    "CSI": csi,
+                    "CSITimestamps": csi_timestamps,
+                    "CSIHead": vals["CSIHead"],
+                    "CSICount": vals["CSICount"],
+                    "CSITotal": vals["CSITotal"]
+                }
+            return snapshot
 
     def get_all_devices(self):
         with self.lock:
             snapshot = {}
             for d_id, vals in self.devices.items():
-                # For CSI, we convert the deque of dicts to a list of dicts
-                csi_list = list(vals["CSI"])
+                # For CSI, we copy the ring buffer out in chronological order
+                csi, csi_timestamps = self._csi_in_order(vals)
 
                 snapshot[d_id] = {
                     "RSSI": vals["RSSI"],
@@ -111,6 +254,8 @@ class DeviceStatus:
                     "SyncCount": vals["SyncCount"],
                     "LastSyncTimestamp": vals["LastSyncTimestamp"],
                     "Offset": vals["Offset"],
-                    "CSI": csi_list
+                    "CSI": csi,
+                    "CSITimestamps": csi_timestamps,
+                    "CSITotal": vals["CSITotal"]
                 }
             return snapshot
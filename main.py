@@ -1,14 +1,41 @@
-import time
-import queue
+import logging
 import threading
+from collections import deque
 
-from data_acquisition import DataAcquisition
+from data_acquisition import MultiPortAcquisition
 from device_status import DeviceStatus
 from radar import RadarPlotter
-from radar_analyzer import RadarAnalyzer
+from radar_analyzer import RadarAnalyzerProcess
+
+# Keys that identify the sending device, in order of preference
+_ID_KEYS = ("DeviceID", "MAC")
+
+# Render the dashboard offscreen (Agg, on a background thread) and only show the
+# finished frames, see RadarPlotter. Keeps the GUI thread idle at the cost of latency.
+OFFSCREEN_PLOT = False
+
+
+def _pick_id(data):
+    """Return the device ID of a parsed frame, or None if it carries none."""
+    return next((data[k] for k in _ID_KEYS if k in data), None)
+
+
+def _known_id(data, allowed_ids):
+    """Return the device ID of a parsed frame if it's one we track, otherwise None."""
+    device_id = _pick_id(data)
+    if device_id is not None and device_id not in allowed_ids:
+        print(f"[WARN] Unknown device ID {device_id} detected. Ignoring.")
+        return None
+    return device_id
+
 
 def main():
-    data_queue = queue.Queue()
+    # Per-frame debug output (e.g. clock offsets) is off unless you lower this
+    logging.basicConfig(level=logging.WARNING)
+
+    # deque.append/popleft are atomic, the Event just wakes the consumer up
+    data_queue = deque()
+    data_ready = threading.Event()
     device_status = DeviceStatus()
 
     ports = [
@@ -18,72 +45,56 @@ def main():
     ]
     baudrate = 115200
 
-    threads = []
-    for idx, port in enumerate(ports):
-        t = DataAcquisition(port, baudrate, data_queue, name=f"DataAcqThread-{idx}")
-        t.start()
-        threads.append(t)
+    # Suppose you define coords for each device
+    # (Only these devices are "required" to have 10+ packets.)
+    device_coords = {
+        # Adjust these for your real setup
+        "E8:9C:25:06:E9:80": (50, 1),  # Master
+        "E9:9C:25:06:E9:80": (50, 6),   # Slave
+        # You can also define an "AP": (0, 0) if you like
+    }
+    allowed_ids = frozenset(device_coords)
+
+    # One thread services every port. Frames with none of the ID keys can
+    # never be attributed to a device, so they're dropped before parsing.
+    acquisition = MultiPortAcquisition(ports, baudrate, data_queue, data_ready, id_keys=_ID_KEYS)
+    acquisition.start()
 
     stop_flag = threading.Event()
 
     def consumer_loop():
         while not stop_flag.is_set():
-            try:
-                data = data_queue.get(timeout=0.5)
+            data_ready.wait(timeout=0.5)
+            data_ready.clear()
+
+            # Drain everything the acquisition thread has appended so far,
+            # then apply it to DeviceStatus under one lock acquisition
+            batch = []
+            while data_queue:
+                data = data_queue.popleft()
                 # Identify device ID
-                if "DeviceID" in data:
-                    device_id = data["DeviceID"]
-                elif "MAC" in data:
-                    device_id = data["MAC"]
-                else:
+                device_id = _known_id(data, allowed_ids)
+                if device_id is None:
                     continue
-                if device_id not in device_coords:
-                    print(f"[WARN] Unknown device ID {device_id} detected. Ignoring.")
-                    continue                    
+                batch.append((device_id, data))
+
+            if batch:
                 # Update your DeviceStatus with all incoming data
-                device_status.update_device(device_id, data)
-
-                # Drain the queue quickly
-                while True:
-                    try:
-                        data = data_queue.get_nowait()
-                        if "DeviceID" in data:
-                            device_id = data["DeviceID"]
-                        elif "MAC" in data:
-                            device_id = data["MAC"]
-                        else:
-                            continue
-                        if device_id not in device_coords:
-                            print(f"[WARN] Unknown device ID {device_id} detected. Ignoring.")
-                            continue    
-                        device_status.update_device(device_id, data)
-
-                    except queue.Empty:
-                        break
-
-            except queue.Empty:
-                pass
+                device_status.update_batch(batch)
 
     consumer_thread = threading.Thread(target=consumer_loop, daemon=True)
     consumer_thread.start()
 
-    # Suppose you define coords for each device
-    # (Only these devices are "required" to have 10+ packets.)
-    device_coords = {
-        # Adjust these for your real setup
-        "E8:9C:25:06:E9:80": (50, 1),  # Master
-        "E9:9C:25:06:E9:80": (50, 6),   # Slave
-        # You can also define an "AP": (0, 0) if you like
-    }
-    time.sleep(1)
     # -- WAIT until each device has at least 10 packets of CSI data --
     wait_for_packets(device_status, device_coords, min_packets=10)
 
-    # Once we have enough data from each device, proceed:
-    analyzer = RadarAnalyzer(device_status, device_coords, interval=0.1)
+    # Once we have enough data from each device, proceed.
+    # The analysis runs in its own process so it doesn't compete with the plot
+    # for the GIL (RadarAnalyzer is the single-process, threaded equivalent).
+    analyzer = RadarAnalyzerProcess(device_status, device_coords, interval=0.1)
     analyzer.start()
 
-    radar_plotter = RadarPlotter(device_status, analyzer)
+    radar_plotter = RadarPlotter(device_status, analyzer, offscreen=OFFSCREEN_PLOT)
     radar_plotter.run()
 
     # Once user closes the plot window, we stop everything
@@ -91,9 +102,8 @@ def main():
     analyzer.stop()
     analyzer.join()
 
-    for t in threads:
-        t.stop()
-        t.join()
+    acquisition.stop()
+    acquisition.join()
 
     consumer_thread.join()
     print("[INFO] Exiting main.")
@@ -104,39 +114,29 @@ def wait_for_packets(device_status, device_coords, min_packets=10):
     Then prints device info (IP and # of packets).
     """
     print(f"[INFO] Waiting for at least {min_packets} packets from each device...")
-    # We'll poll the device_status until each device has enough CSI frames.
     required_devices = set(device_coords.keys())
 
-    while True:
-        
-        all_ready = True
-        current_data = device_status.get_all_devices()  # snapshot
+    # Sleeps on DeviceStatus' condition, waking every couple of seconds to report progress
+    while not device_status.wait_for_csi(required_devices, min_packets, timeout=2.0):
+        current_data = device_status.snapshot()  # scalars only, CSI stays in place
         for dev_id in required_devices:
-            # Get the CSI array from that device if present
-            dev_csi = current_data.get(dev_id, {}).get("CSI", [])
+            # Get the number of CSI frames from that device if present
+            csi_count = current_data.get(dev_id, {}).get("CSICount", 0)
             print(f"  Device: {dev_id}")
-            print(f"    # of CSI Packets: {len(dev_csi)}\n")
-            if len(dev_csi) < min_packets:
-                all_ready = False
-                break
-
-        if all_ready:
-            # Print info about each device once they meet the requirement
-            print("[INFO] All devices have at least "
-                  f"{min_packets} packets. Here is the summary:\n")
-
-            for dev_id in required_devices:
-                dev_data = current_data.get(dev_id, {})
-                ip_addr = dev_data.get("IPAddress", "Unknown IP")
-                csi_count = len(dev_data.get("CSI", []))
-                print(f"  Device: {dev_id}")
-                print(f"    IP: {ip_addr}")
-                print(f"    # of CSI Packets: {csi_count}\n")
-
-            break
-        else:
-            time.sleep(0.5)
-              # Sleep briefly and check again
+            print(f"    # of CSI Packets: {csi_count}\n")
+
+    # Print info about each device once they meet the requirement
+    print("[INFO] All devices have at least "
+          f"{min_packets} packets. Here is the summary:\n")
+
+    current_data = device_status.snapshot()
+    for dev_id in required_devices:
+        dev_data = current_data.get(dev_id, {})
+        ip_addr = dev_data.get("IPAddress", "Unknown IP")
+        csi_count = dev_data.get("CSICount", 0)
+        print(f"  Device: {dev_id}")
+        print(f"    IP: {ip_addr}")
+        print(f"    # of CSI Packets: {csi_count}\n")
 
 if __name__ == "__main__":
     main()
@@ -1,177 +1,334 @@
+import threading
 import matplotlib.pyplot as plt
 import matplotlib.animation as animation
 import matplotlib.gridspec as gridspec
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 import numpy as np
 
 
 def pad_csi_frames(csi_frames):
     """
     Ensure each frame in csi_frames is the same length by zero-padding.
-    Returns a 2D numpy array of shape (#frames, max_len).
+    Returns a 2D float32 numpy array of shape (#frames, max_len).
+    Empty input gives a read-only (0, 0) array.
     """
-    if not csi_frames:
-        return np.array([[0]])  # a 1x1 just to avoid empty array edge-cases
-
-    # Find the max subcarrier length among all frames
-    max_len = max(len(frame) for frame in csi_frames)
-
-    padded = []
-    for frame in csi_frames:
-        # If some frames are shorter, pad with 0s.
-        # If some are longer, you could slice or handle them otherwise.
-        needed = max_len - len(frame)
-        if needed > 0:
-            new_frame = list(frame) + [0]*needed
-        else:
-            new_frame = list(frame)  # same length or longer => no padding
-        padded.append(new_frame)
+    if not len(csi_frames):
+        return np.broadcast_to(np.float32(0), (0, 0))  # nothing allocated
+
+    lens = [len(frame) for frame in csi_frames]
+    max_len = max(lens)
+    if min(lens) == max_len:
+        # Already rectangular, convert in one go
+        return np.asarray(csi_frames, dtype=np.float32)
 
-    return np.array(padded)
+    # Shorter frames keep the zeros past their end. float32 holds any CSI
+    # value and is what the analysis works in.
+    padded = np.zeros((len(csi_frames), max_len), dtype=np.float32)
+    for i, frame in enumerate(csi_frames):
+        padded[i, :lens[i]] = np.asarray(frame)
+
+    return padded
 
 
 class RadarPlotter:
-    def __init__(self, device_status, analyzer):
+    """
+    Live dashboard. All artists are created once and then updated in place,
+    so FuncAnimation can blit only the parts that change. Whenever an axis
+    range has to move we do one full redraw to refresh the cached background.
+
+    With offscreen=True the dashboard is instead rendered with Agg on a
+    background thread every render_interval seconds, and the GUI window only
+    shows the latest RGBA frame (refreshed every display_interval seconds).
+    Use this when display latency matters less than keeping the GUI thread idle.
+    """
+    def __init__(self, device_status, analyzer, offscreen=False, render_interval=1.0, display_interval=0.2):
         self.device_status = device_status
         self.analyzer = analyzer
+        self.offscreen = offscreen
+        self.render_interval = render_interval
+        self.display_interval = display_interval
 
-        self.fig = plt.figure(figsize=(16, 10))
+        if self.offscreen:
+            # Not managed by pyplot, so it can be drawn from another thread
+            self.fig = Figure(figsize=(16, 10))
+            FigureCanvasAgg(self.fig)
+        else:
+            self.fig = plt.figure(figsize=(16, 10))
         gs = gridspec.GridSpec(nrows=3, ncols=2, figure=self.fig, height_ratios=[1, 1, 1.5])
 
         # RSSI subplot
         self.ax_rssi = self.fig.add_subplot(gs[0, 0])
+        self.ax_rssi.set_title("RSSI (live)")
+        self.ax_rssi.set_xlabel("Device")
+        self.ax_rssi.set_ylabel("RSSI (dBm)")
+        self.ax_rssi.set_ylim(-100, 0)
+
         # Memory subplot
         self.ax_mem = self.fig.add_subplot(gs[0, 1])
+        self.ax_mem.set_title("Memory (FreeHeap)")
+        self.ax_mem.set_xlabel("Device")
+        self.ax_mem.set_ylabel("Bytes")
+        self.ax_mem.set_ylim(0, 1)
+
         # Radar subplot
         self.ax_radar = self.fig.add_subplot(gs[1, :])
         self.ax_radar.set_aspect('equal', 'box')
+        # Scores are shifted by 120 (see _update_artists), the colour range is fixed
+        self.scatter = self.ax_radar.scatter(
+            [], [], c=[], cmap='jet', vmin=120, vmax=200, s=100, alpha=0.8, animated=True
+        )
+        self.colorbar = self.fig.colorbar(self.scatter, ax=self.ax_radar)
+        self.colorbar.set_label("Motion Score")
+
+        # Bars, IP labels and radar points, one per device in device_coords
+        self.device_ids = None
+        self.rssi_bars = self.mem_bars = None
+        self.ip_texts = []
+        self._build_device_artists()
 
         # Subcarrier spectrogram subplot
         self.ax_subcarriers = self.fig.add_subplot(gs[2, :])
+        self.ax_subcarriers.set_title("Subcarrier Spectrogram E9:9C:25:06:E9:80")
+        self.ax_subcarriers.set_xlabel("Time before newest frame (s)")
+        self.ax_subcarriers.set_ylabel("Frequency (Hz)")
+        # Limits are managed in _update_artists, keep set_extent from moving them
+        self.ax_subcarriers.set_autoscale_on(False)
 
-        # Initialize spectrogram references
-        self.spectrogram = None  # pcolormesh object for the spectrogram
-        self.colorbar_spectrogram = None  # Colorbar for the spectrogram
+        # One image for the spectrogram, its data and extent are swapped in place.
+        # Hidden until the analyzer has produced something.
+        self.spectrogram = self.ax_subcarriers.imshow(
+            np.zeros((1, 1)),
+            origin='lower',
+            aspect='auto',
+            cmap='jet',
+            interpolation='bilinear',
+            extent=(0, 1, 0, 1),
+            animated=True,
+            visible=False
+        )
+        self.colorbar_spectrogram = self.fig.colorbar(
+            self.spectrogram, ax=self.ax_subcarriers, label="Power (dB)"
+        )
+        self.spectrogram_clim = None  # (vmin, vmax) seen so far
 
-        self.colorbar = None  # Store the colorbar reference for radar plot
-        self.scatter = None  # Store the scatter plot reference
         self.anim = None
 
+        # Offscreen mode: latest rendered frame, shared with the GUI thread
+        self.frame_rgba = None
+        self._frame_lock = threading.Lock()
+        self._render_stop = threading.Event()
+
+    def _build_device_artists(self):
+        """
+        (Re)create the per-device artists for the devices in device_coords.
+        Only needed when that set changes, otherwise they're updated in place.
+        """
+        self.device_ids = tuple(self.analyzer.device_coords.keys())
+        n_devices = len(self.device_ids)
+
+        # Per-device values, refilled in place every tick
+        self.rssi_values = np.zeros(n_devices)
+        self.mem_values = np.zeros(n_devices)
+        self.motion_values = np.zeros(n_devices)
+        self.ip_labels = [""] * n_devices
+
+        # Removing a BarContainer also drops its patches and its entry in ax.containers
+        for artist in [self.rssi_bars, self.mem_bars, *self.ip_texts]:
+            if artist is not None:
+                artist.remove()
+
+        # Numeric positions with device ID tick labels rather than a categorical
+        # axis, which would keep the categories of devices that are gone
+        positions = np.arange(n_devices)
+        self.rssi_bars = self.ax_rssi.bar(positions, np.zeros(n_devices), color='blue', animated=True)
+        self.mem_bars = self.ax_mem.bar(positions, np.zeros(n_devices), color='green', animated=True)
+        for ax in (self.ax_rssi, self.ax_mem):
+            ax.set_xticks(positions, labels=self.device_ids)
+            ax.set_xlim(-0.6, n_devices - 0.4)
+
+        # IP address labels, standing at the foot of each memory bar (x in data,
+        # y in axes coordinates), so they stay put and readable with or without a bar
+        ip_transform = self.ax_mem.get_xaxis_transform()
+        self.ip_texts = [
+            self.ax_mem.text(
+                bar.get_x() + bar.get_width() / 2, 0.03, "",
+                transform=ip_transform,
+                ha='center',
+                va='bottom',
+                rotation=90,
+                fontsize=9,
+                color='black',
+                clip_on=True,
+                animated=True
+            )
+            for bar in self.mem_bars
+        ]
+
+        coords = np.array([self.analyzer.device_coords[d_id] for d_id in self.device_ids], dtype=float).reshape(-1, 2)
+        self.scatter.set_offsets(coords)
+        self.scatter.set_array(np.full(n_devices, 120.0))
+        if n_devices:
+            self.ax_radar.set_xlim(coords[:, 0].min() - 10, coords[:, 0].max() + 10)
+            self.ax_radar.set_ylim(coords[:, 1].min() - 10, coords[:, 1].max() + 10)
+
+    @staticmethod
+    def _limits_stale(current, lo, hi, fill=0.8):
+        """True if [lo, hi] sticks out of the current limits or fills less than 'fill' of them."""
+        cur_lo, cur_hi = current
+        return lo < cur_lo or hi > cur_hi or (hi - lo) < fill * (cur_hi - cur_lo)
+
+    def _artists(self):
+        return [*self.rssi_bars, *self.mem_bars, *self.ip_texts, self.scatter, self.spectrogram]
+
     def init_plots(self):
-        # Initialize radar plot
-        self.scatter = self.ax_radar.scatter([], [], c=[], cmap='jet', s=100, alpha=0.8)
-        self.colorbar = self.fig.colorbar(self.scatter, ax=self.ax_radar)
-        self.colorbar.set_label("Motion Score")
-        return []
+        # Artists are built in __init__, this is also called again after a resize
+        return self._artists()
 
     def update_plots(self, frame):
-        devices_data = self.device_status.get_all_devices()
-        device_ids = list(devices_data.keys())
+        """FuncAnimation callback: update the artists, redraw the static parts only if needed."""
+        if self._update_artists():
+            # Axis ranges moved: redraw the static parts so the blit background is refreshed
+            self.fig.canvas.draw()
+        return self._artists()
 
-        # --------
-        # RSSI
-        # --------
-        self.ax_rssi.clear()
-        self.ax_rssi.set_title("RSSI (live)")
-        self.ax_rssi.set_xlabel("Device")
-        self.ax_rssi.set_ylabel("RSSI (dBm)")
+    def _update_artists(self):
+        """Refresh every artist from the latest data. Returns True if a full redraw is needed."""
+        # Only scalar fields are needed here, so skip the CSI copy
+        devices_data = self.device_status.snapshot()
+        needs_redraw = False
 
-        rssi_values = [devices_data[d_id].get("RSSI", 0) or 0 for d_id in device_ids]
-        self.ax_rssi.bar(device_ids, rssi_values, color='blue')
+        if tuple(self.analyzer.device_coords) != self.device_ids:
+            # Devices were added or removed: new bars, and new artists to blit
+            self._build_device_artists()
+            needs_redraw = True
 
         # --------
-        # Memory
+        # RSSI / Memory
         # --------
-        self.ax_mem.clear()
-        self.ax_mem.set_title("Memory (FreeHeap)")
-        self.ax_mem.set_xlabel("Device")
-        self.ax_mem.set_ylabel("Bytes")
+        # One pass over the devices fills every per-device value the plots need
+        motion_scores = self.analyzer.motion_scores
+        for i, d_id in enumerate(self.device_ids):
+            dev = devices_data.get(d_id, {})
+            self.rssi_values[i] = dev.get("RSSI", 0) or 0
+            self.mem_values[i] = dev.get("FreeHeap", 0) or 0
+            self.ip_labels[i] = dev.get("IPAddress", None) or ""
+            self.motion_values[i] = motion_scores.get(d_id, 0.0)
 
-        mem_values = [devices_data[d_id].get("FreeHeap", 0) or 0 for d_id in device_ids]
-        mem_bars = self.ax_mem.bar(device_ids, mem_values, color='green')
-
-        for i, bar in enumerate(mem_bars):
-            dev_id = device_ids[i]
-            ip_addr = devices_data[dev_id].get("IPAddress", None)
-            if ip_addr:
-                height = bar.get_height()
-                x_pos = bar.get_x() + bar.get_width() / 2
-                self.ax_mem.text(
-                    x_pos,
-                    height + max(1000, 0.02 * height),
-                    f"{ip_addr}",
-                    ha='center',
-                    va='bottom',
-                    rotation=90,
-                    fontsize=9
-                )
+        for i in range(len(self.device_ids)):
+            self.rssi_bars[i].set_height(self.rssi_values[i])
+            self.mem_bars[i].set_height(self.mem_values[i])
+            self.ip_texts[i].set_text(self.ip_labels[i])
+
+        max_mem = self.mem_values.max(initial=0)
+        if max_mem > 0 and self._limits_stale(self.ax_mem.get_ylim(), 0, max_mem * 1.1):
+            self.ax_mem.set_ylim(0, max_mem * 1.25)
+            needs_redraw = True
 
         # --------
         # Radar
         # --------
-        x_vals = []
-        y_vals = []
-        motion_vals = []
+        # Shift motion scores by 120 to ensure all values are positive
+        self.scatter.set_array(self.motion_values + 120)
 
-        for d_id in device_ids:
-            coords = self.analyzer.device_coords.get(d_id, (0.0, 0.0))
-            x_vals.append(coords[0])
-            y_vals.append(coords[1])
+        # --------
+        # Subcarrier Spectrogram
+        # --------
+        example_device = "E9:9C:25:06:E9:80"
+        subcarrier_results = self.analyzer.subcarrier_data.get(example_device)
+        if subcarrier_results:
+            # Plot the first analysed subcarrier as an example
+            f, t_stft = subcarrier_results["f"], subcarrier_results["t"]
+            Zxx_dB = subcarrier_results["Zxx_dB"][0]
 
-            # Shift motion scores by 120 to ensure all values are positive
-            motion_score = self.analyzer.motion_scores.get(d_id, 0.0)
-            motion_vals.append(motion_score + 120)
+            # Ensure Zxx_dB has the correct shape
+            if Zxx_dB.shape == (len(f), len(t_stft)):
+                self.spectrogram.set_data(Zxx_dB)
+                self.spectrogram.set_extent((t_stft[0], t_stft[-1], f[0], f[-1]))
+                self.spectrogram.set_visible(True)
 
-        self.scatter.set_offsets(np.c_[x_vals, y_vals])
-        self.scatter.set_array(np.array(motion_vals))
-        self.scatter.set_clim(vmin=120, vmax=200)
-        self.colorbar.update_normal(self.scatter)
+                # Colour range only ever widens, so the colorbar stays valid between full redraws
+                lo, hi = float(Zxx_dB.min()), float(Zxx_dB.max())
+                if self.spectrogram_clim is None:
+                    self.spectrogram_clim = (lo, hi)
+                    needs_redraw = True
+                elif lo < self.spectrogram_clim[0] or hi > self.spectrogram_clim[1]:
+                    self.spectrogram_clim = (min(lo, self.spectrogram_clim[0]), max(hi, self.spectrogram_clim[1]))
+                    needs_redraw = True
+                self.spectrogram.set_clim(*self.spectrogram_clim)
 
-        self.ax_radar.set_xlim(min(x_vals) - 10, max(x_vals) + 10)
-        self.ax_radar.set_ylim(min(y_vals) - 10, max(y_vals) + 10)
+                # Times count back from the newest frame, so the axis ends at 0. The
+                # oldest column wanders by up to a hop as frames arrive and f[-1]
+                # with the estimated rate, the slack below absorbs both.
+                col = t_stft[1] - t_stft[0] if len(t_stft) > 1 else 0.0
+                if (self._limits_stale(self.ax_subcarriers.get_xlim(), t_stft[0], 0.0, fill=0.5)
+                        or self._limits_stale(self.ax_subcarriers.get_ylim(), f[0], f[-1])):
+                    self.ax_subcarriers.set_xlim(t_stft[0] - col, 0.0)
+                    self.ax_subcarriers.set_ylim(f[0], f[-1] * 1.05)
+                    needs_redraw = True
+            else:
+                print(f"[WARN] Skipping spectrogram: shape mismatch for device {example_device}")
 
-        # --------
-        # Subcarrier Spectrogram
-        # --------
-        self.ax_subcarriers.clear()
-        self.ax_subcarriers.set_title("Subcarrier Spectrogram E9:9C:25:06:E9:80")
-        self.ax_subcarriers.set_xlabel("Time (s)")
-        self.ax_subcarriers.set_ylabel("Frequency (Hz)")
+        return needs_redraw
 
-        example_device = "E9:9C:25:06:E9:80"
-        if example_device and example_device in self.analyzer.subcarrier_data:
-            subcarrier_results = self.analyzer.subcarrier_data[example_device]
-
-            # Plot data for the first subcarrier as an example
-            subcarrier_index = 0
-            if subcarrier_index in subcarrier_results:
-                f, t_stft, Zxx_dB, _ = subcarrier_results[subcarrier_index]
-
-                # Ensure Zxx_dB has the correct shape
-                if Zxx_dB.shape == (len(f), len(t_stft)):
-                    # Create or update the spectrogram
-                    self.spectrogram = self.ax_subcarriers.pcolormesh(
-                        t_stft, f, Zxx_dB, shading='gouraud', cmap='jet'
-                    )
-                    if self.colorbar_spectrogram is None:
-                        self.colorbar_spectrogram = plt.colorbar(
-                            self.spectrogram, ax=self.ax_subcarriers, label="Power (dB)"
-                        )
-                    else:
-                        self.colorbar_spectrogram.update_normal(self.spectrogram)
-                else:
-                    print(f"[WARN] Skipping spectrogram: shape mismatch for device {example_device}")
-
-        return []
+    def _render_offscreen(self):
+        """Background thread: update the artists and rasterise the dashboard into frame_rgba."""
+        while not self._render_stop.wait(self.render_interval):
+            # Every frame gets one full draw here anyway, so the redraw flag is moot
+            self._update_artists()
+            artists = self._artists()
+            self.fig.canvas.draw()
+            # Animated artists are skipped by a normal draw, render them on top
+            for artist in artists:
+                self.fig.draw_artist(artist)
+
+            with self._frame_lock:
+                np.copyto(self.frame_rgba, np.asarray(self.fig.canvas.buffer_rgba()))
+
+    def _run_offscreen(self):
+        self.fig.tight_layout()
+        width, height = self.fig.canvas.get_width_height()
+        self.frame_rgba = np.zeros((height, width, 4), dtype=np.uint8)
+
+        render_thread = threading.Thread(target=self._render_offscreen, name="RadarRender", daemon=True)
+        render_thread.start()
 
+        # The window itself is a single image of the last rendered frame
+        view_fig = plt.figure(figsize=(16, 10))
+        view_ax = view_fig.add_axes([0, 0, 1, 1])
+        view_ax.set_axis_off()
+        view_image = view_ax.imshow(self.frame_rgba, animated=True)
+
+        def refresh(frame):
+            with self._frame_lock:
+                view_image.set_data(self.frame_rgba)
+            return [view_image]
+
+        self.anim = animation.FuncAnimation(
+            view_fig,
+            refresh,
+            blit=True,
+            interval=int(self.display_interval * 1000),
+            cache_frame_data=False
+        )
+        plt.show(block=True)
+
+        self._render_stop.set()
+        render_thread.join()
 
     def run(self):
+        if self.offscreen:
+            self._run_offscreen()
+            return
+
         self.anim = animation.FuncAnimation(
             self.fig,
             self.update_plots,
             init_func=self.init_plots,
-            blit=False,
+            blit=True,
             interval=100,
-            save_count=300
+            # Live view, nothing is ever saved: don't keep returned frames around
+            cache_frame_data=False
         )
         plt.tight_layout()
         plt.show(block=True)
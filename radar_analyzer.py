@@ -1,9 +1,267 @@
+import multiprocessing
 import time
 import threading
+from multiprocessing.shared_memory import SharedMemory
+from types import MappingProxyType
 import numpy as np
-from scipy import signal
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy import fft, signal
 
-class RadarAnalyzer(threading.Thread):
+from device_status import MAX_CSI_FRAMES, N_SUBCARRIERS
+
+MAX_NPERSEG = 64  # STFT window length once enough history has built up
+
+# Largest spectrogram the analysis can produce from a full CSI history
+MAX_BINS = MAX_NPERSEG // 2 + 1
+MAX_TIMES = -(-MAX_CSI_FRAMES // (MAX_NPERSEG // 2)) + 1
+
+
+def _hann_dft_matrix(nperseg):
+    """
+    (nperseg, 2 * (nperseg // 2 + 1)) float32 matrix so that frames @ matrix,
+    viewed as complex64, is the one-sided FFT of the Hann-windowed frames
+    (scaled like _window()). Columns alternate real / imaginary parts.
+    """
+    window = signal.get_window("hann", nperseg)
+    window /= window.sum()
+    angles = -2 * np.pi * np.outer(np.arange(nperseg), np.arange(nperseg // 2 + 1)) / nperseg
+    matrix = np.empty((nperseg, 2 * (nperseg // 2 + 1)), dtype=np.float32)
+    matrix[:, 0::2] = np.cos(angles) * window[:, None]
+    matrix[:, 1::2] = np.sin(angles) * window[:, None]
+    return matrix
+
+
+# The window is nearly always MAX_NPERSEG long, so its transform is one constant matrix
+HANN_DFT64 = _hann_dft_matrix(MAX_NPERSEG)
+
+
+class DopplerAnalysis:
+    """
+    The STFT / motion score computation, plus the caches it keeps between
+    calls. Shared by RadarAnalyzer and RadarAnalyzerProcess' worker.
+    """
+
+    def __init__(self):
+        # Scaled Hann windows, cached per nperseg
+        self._windows = {}
+        # Streaming STFT state per device, see _stft_incremental()
+        self._stft_cache = {}
+        # Scratch buffer for the dB conversion, reallocated when the shape changes
+        self._db_buf = None
+
+    def calculate_sampling_rate(self, csi_timestamps):
+        """Estimate the sampling rate based on CSI frame timestamps (microseconds)."""
+        if len(csi_timestamps) < 2:
+            raise ValueError("Not enough CSI frames to calculate sampling rate.")
+
+        # The mean of the diffs telescopes to (last - first) / (n - 1),
+        # so only the endpoints are needed (raw int64 microseconds, exact)
+        span = int(csi_timestamps[-1]) - int(csi_timestamps[0])
+
+        if span <= 0:
+            raise ValueError("Invalid or zero intervals in timestamps.")
+
+        return (len(csi_timestamps) - 1) * 1e6 / span
+
+    def _window(self, nperseg):
+        """Hann window for 'nperseg', pre-scaled like signal.stft's 'spectrum' scaling."""
+        window = self._windows.get(nperseg)
+        if window is None:
+            window = signal.get_window("hann", nperseg).astype(np.float32)
+            window /= window.sum()
+            self._windows[nperseg] = window
+        return window
+
+    def _rfft(self, frames):
+        """
+        rfft along the last axis of a float32 array. Only reached while the
+        history is shorter than MAX_NPERSEG (see _windowed_rfft); the input
+        shape changes every tick then, so there is no FFT plan worth caching.
+        """
+        # workers=-1: spread the batch of FFTs over all CPU cores
+        return fft.rfft(frames, axis=-1, workers=-1)
+
+    def stft(self, amp_vals, sampling_rate, nperseg, noverlap):
+        """
+        Real-input STFT along the last axis over full windows only, matching
+        signal.stft(..., boundary=None, padded=False) (Hann window, 'spectrum'
+        scaling) but only computing the nperseg // 2 + 1 one-sided bins.
+        Same window definition as _stft_incremental(), so scores don't jump
+        when the analysis switches over to streaming.
+
+        :return: f, t_stft, Zxx with Zxx shaped (..., #freqs, #times)
+        """
+        hop = nperseg - noverlap
+        n_windows = (amp_vals.shape[-1] - nperseg) // hop + 1
+
+        # Windows are strided views into amp_vals, no copy until the multiply,
+        # which fills the C-contiguous float32 block pocketfft is fastest on
+        windows = sliding_window_view(amp_vals, nperseg, axis=-1)[..., ::hop, :]
+        Zxx = self._windowed_rfft(windows, nperseg)
+
+        f = fft.rfftfreq(nperseg, 1.0 / sampling_rate)
+        t_stft = (np.arange(n_windows) * hop + nperseg / 2) / sampling_rate
+        return f, t_stft, Zxx.swapaxes(-1, -2)
+
+    def _windowed_rfft(self, windows, nperseg):
+        """
+        One-sided FFT of the Hann-windowed frames along the last axis.
+        For nperseg == MAX_NPERSEG this is a single BLAS matmul against
+        HANN_DFT64 (window included), which beats an FFT call at this size.
+        """
+        if nperseg == MAX_NPERSEG:
+            # Flattened to 2D so it's one GEMM rather than a batch of tiny ones
+            spectra = np.matmul(windows.reshape(-1, nperseg), HANN_DFT64).view(np.complex64)
+            return spectra.reshape(windows.shape[:-1] + (nperseg // 2 + 1,))
+        # Warm-up only: the shape changes every tick, so there's no buffer worth keeping
+        return self._rfft(windows * self._window(nperseg))
+
+    def _to_db(self, Zxx):
+        """
+        20 * log10(|Zxx| + 1e-6) as float32, written into a reused buffer.
+        The result is overwritten on the next call, copy it if you keep it.
+        """
+        if self._db_buf is None or self._db_buf.shape != Zxx.shape:
+            self._db_buf = np.empty(Zxx.shape, dtype=np.float32)
+        out = self._db_buf
+
+        # In-place ufuncs: SIMD-vectorised and no temporaries
+        np.abs(Zxx, out=out)
+        out += 1e-6
+        np.log10(out, out=out)
+        out *= 20
+        return out
+
+    def _stft_incremental(self, device, subcarriers, amp_vals, first_index, sampling_rate, nperseg, noverlap):
+        """
+        Streaming STFT: windows sit on a fixed grid of absolute frame indices
+        (multiples of the hop), so columns computed on earlier ticks are kept
+        and only the windows completed by newly arrived frames are transformed.
+        Columns whose window has started to fall out of the history are dropped.
+        Windows are full (no edge padding), the same as in stft().
+
+        :param first_index: Absolute frame index of amp_vals[:, 0].
+        :return: f, t_stft, Zxx with Zxx shaped (#subcarriers, #freqs, #times)
+        """
+        hop = nperseg - noverlap
+        end_index = first_index + amp_vals.shape[-1]
+
+        # Cached columns are only reusable for the same rows and window
+        key = (nperseg, noverlap, subcarriers.tobytes())
+        cache = self._stft_cache.get(device)
+        if cache is None or cache["key"] != key:
+            cache = {
+                "key": key,
+                "starts": np.empty(0, dtype=np.int64),
+                "Zxx": np.empty((len(subcarriers), nperseg // 2 + 1, 0), dtype=np.complex64)
+            }
+            self._stft_cache[device] = cache
+
+        keep = cache["starts"] >= first_index
+        starts, Zxx = cache["starts"][keep], cache["Zxx"][..., keep]
+
+        # Next window on the grid, then every one the latest frames completed
+        next_start = starts[-1] + hop if len(starts) else -(-first_index // hop) * hop
+        new_starts = np.arange(next_start, end_index - nperseg + 1, hop)
+        if len(new_starts):
+            windows = sliding_window_view(amp_vals, nperseg, axis=-1)[..., new_starts - first_index, :]
+            new_Zxx = self._windowed_rfft(windows, nperseg).swapaxes(-1, -2)
+            starts = np.concatenate((starts, new_starts))
+            Zxx = np.concatenate((Zxx, new_Zxx), axis=-1)
+        cache["starts"], cache["Zxx"] = starts, Zxx
+
+        f = fft.rfftfreq(nperseg, 1.0 / sampling_rate)
+        # Time of each window's centre, relative to the oldest frame like stft()
+        t_stft = (starts - first_index + nperseg / 2) / sampling_rate
+        return f, t_stft, Zxx
+
+    def doppler_analysis_all_subcarriers(self, frames, sampling_rate, device=None, first_index=None):
+        """
+        Perform STFT-based Doppler analysis on all available subcarriers in
+        one batched call, ignoring subcarriers with fewer than two non-zero values.
+
+        :param frames: 2D array of shape (#frames, #subcarriers), oldest frame first.
+                    Shorter frames are zero-padded.
+        :param sampling_rate: Approximate packets/sec.
+        :param device: If given together with first_index (the absolute index of
+                    frames[0]), STFT columns are cached for this device and only
+                    new windows are computed on later calls.
+
+        :return:
+        subcarrier_results (dict): Per-subcarrier results as stacked arrays, empty if nothing was valid.
+            {
+              "f": frequency bins, "t": window centres in seconds before the newest frame (<= 0),
+              "Zxx_dB": float16 array of shape (#subcarriers, #freqs, #times),
+              "scores": motion score per subcarrier,
+              "subcarriers": index of each row in the CSI frame
+            }
+        aggregated_motion_score (float): Aggregate score from all subcarriers.
+        """
+        csi = np.asarray(frames, dtype=np.float32)
+
+        # Only analyse subcarriers with at least two non-zero samples
+        valid_subcarriers = np.flatnonzero(np.count_nonzero(csi, axis=0) >= 2)
+        skipped = csi.shape[1] - len(valid_subcarriers)
+        if skipped:
+            print(f"[INFO] Skipping {skipped} subcarriers due to insufficient data.")
+
+        if len(valid_subcarriers) == 0:
+            print("[WARN] No valid subcarriers with data to process.")
+            return {}, 0.0
+
+        # One row per subcarrier, so a single STFT call covers all of them
+        amp_vals = np.ascontiguousarray(csi[:, valid_subcarriers].T)
+        nperseg = min(amp_vals.shape[1], MAX_NPERSEG)
+        noverlap = min(nperseg // 2, 32)  # Ensure noverlap is always less than nperseg
+
+        # Perform STFT -> Zxx has shape (#subcarriers, #freqs, #times).
+        # Short warm-up histories are recomputed in full, after that we stream:
+        # with at least nperseg + hop frames there's always a full window on the grid.
+        streaming = (
+            device is not None and first_index is not None
+            and nperseg == MAX_NPERSEG and amp_vals.shape[1] >= 2 * nperseg - noverlap
+        )
+        if streaming:
+            f, t_stft, Zxx = self._stft_incremental(
+                device, valid_subcarriers, amp_vals, first_index, sampling_rate, nperseg, noverlap
+            )
+        else:
+            f, t_stft, Zxx = self.stft(amp_vals, sampling_rate, nperseg, noverlap)
+
+        # Measure time back from the newest frame (t = 0). The oldest frame
+        # moves every tick, an axis anchored to it would too.
+        t_stft = t_stft - (amp_vals.shape[1] - 1) / sampling_rate
+
+        # Convert magnitude to dB
+        Zxx_dB = self._to_db(Zxx)
+
+        # Motion score per subcarrier: mean power of the latest time slice,
+        # one reduction over (#subcarriers, #freqs)
+        if Zxx_dB.shape[-1] > 0:
+            motion_scores = Zxx_dB[..., -1].mean(axis=1, dtype=np.float32)
+        else:
+            motion_scores = np.zeros(len(valid_subcarriers), dtype=np.float32)
+
+        # The spectrogram is only displayed, float16 is plenty and halves its size.
+        # Scores above were computed at full precision. This also copies the
+        # result out of the dB scratch buffer.
+        Zxx_dB = Zxx_dB.astype(np.float16)
+
+        subcarrier_results = {
+            "f": f,
+            "t": t_stft,
+            "Zxx_dB": Zxx_dB,
+            "scores": motion_scores,
+            "subcarriers": valid_subcarriers
+        }
+
+        # Aggregate motion score across all valid subcarriers
+        aggregated_motion_score = float(motion_scores.mean()) if motion_scores.size else 0.0
+
+        return subcarrier_results, aggregated_motion_score
+
+
+class RadarAnalyzer(DopplerAnalysis, threading.Thread):
     """
     A background thread that periodically:
       - Pulls snapshots (device data) from DeviceStatus
@@ -13,7 +271,8 @@ class RadarAnalyzer(threading.Thread):
     """
 
     def __init__(self, device_status, device_coords, interval=1.0, name="RadarAnalyzer"):
-        super().__init__(name=name)
+        threading.Thread.__init__(self, name=name)
+        DopplerAnalysis.__init__(self)
         self.device_status = device_status
         self.device_coords = device_coords
         self.interval = interval
@@ -21,9 +280,10 @@ class RadarAnalyzer(threading.Thread):
 
         # Store STFT results and motion scores per device
         self.heatmaps = {}      # { device_id: (f, t, Zxx_dB) aggregated across subcarriers }
-        self.subcarrier_data = {}  # Detailed per-subcarrier data
+        self.subcarrier_data = {}  # { device_id: {"f", "t", "Zxx_dB", "scores", "subcarriers"} }
         self.motion_scores = {} # { device_id: aggregated motion score }
 
+
     def run(self):
         while not self._stop_event.is_set():
             # Get the latest snapshot of all devices
@@ -35,12 +295,14 @@ class RadarAnalyzer(threading.Thread):
                     csi_frames = snapshot[device]["CSI"]
                     try:
                         # 1) Calculate sampling rate
-                        sampling_rate = self.calculate_sampling_rate(csi_frames)
+                        sampling_rate = self.calculate_sampling_rate(snapshot[device]["CSITimestamps"])
 
                         # 2) Run Doppler analysis on all subcarriers
                         subcarrier_results, aggregated_motion_score = self.doppler_analysis_all_subcarriers(
                             frames=csi_frames,
-                            sampling_rate=sampling_rate
+                            sampling_rate=sampling_rate,
+                            device=device,
+                            first_index=snapshot[device]["CSITotal"] - len(csi_frames)
                         )
 
                         # 3) Store the results
@@ -58,84 +320,199 @@ class RadarAnalyzer(threading.Thread):
         """Signal the thread to stop."""
         self._stop_event.set()
 
-    def calculate_sampling_rate(self, csi_frames):
-        """Estimate the sampling rate based on CSI frame timestamps."""
-        if len(csi_frames) < 2:
-            raise ValueError("Not enough CSI frames to calculate sampling rate.")
 
-        timestamps = [frame["Timestamp"] / 1e6 for frame in csi_frames]
-        intervals = np.diff(timestamps)
+def _shared_layout(n_devices):
+    """(name, shape, dtype) of every array RadarAnalyzerProcess shares with its worker."""
+    return [
+        # Input, written by the feeder thread: chronological CSI history per device
+        ("csi", (n_devices, MAX_CSI_FRAMES, N_SUBCARRIERS), np.int8),
+        ("timestamps", (n_devices, MAX_CSI_FRAMES), np.int64),
+        ("frames", (n_devices, 3), np.int64),  # CSICount, CSIWidth, CSITotal
+        # Output, written by the worker: one padded result slot per device
+        ("Zxx_dB", (n_devices, N_SUBCARRIERS, MAX_BINS, MAX_TIMES), np.float16),
+        ("scores", (n_devices, N_SUBCARRIERS), np.float32),
+        ("subcarriers", (n_devices, N_SUBCARRIERS), np.int64),
+        ("f", (n_devices, MAX_BINS), np.float64),
+        ("t", (n_devices, MAX_TIMES), np.float64),
+        ("shape", (n_devices, 4), np.int64),  # analysed, #subcarriers, #freqs, #times
+        ("motion", (n_devices,), np.float64),
+    ]
 
-        if len(intervals) < 1 or np.mean(intervals) <= 0:
-            raise ValueError("Invalid or zero intervals in timestamps.")
 
-        return 1.0 / np.mean(intervals)
+def _shared_arrays(blocks, n_devices):
+    """ndarray views over the SharedMemory blocks created by RadarAnalyzerProcess."""
+    return {
+        name: np.ndarray(shape, dtype=dtype, buffer=blocks[name].buf)
+        for name, shape, dtype in _shared_layout(n_devices)
+    }
 
-    def doppler_analysis_all_subcarriers(self, frames, sampling_rate):
-        """
-        Perform STFT-based Doppler analysis on all available subcarriers,
-        ignoring subcarriers with only zero values.
 
-        :param frames: list of dicts, each with "Timestamp" and "CSI".
-                    Example: frames[i]["CSI"] -> list/array of subcarrier amplitudes.
-        :param sampling_rate: Approximate packets/sec.
+def _analysis_worker(device_ids, blocks, input_lock, output_lock, seq, stop_event, interval):
+    """RadarAnalyzerProcess' worker: analyse the shared CSI history every interval."""
+    shared = _shared_arrays(blocks, len(device_ids))
+    analyzer = DopplerAnalysis()
 
-        :return:
-        subcarrier_results (dict): Detailed results per subcarrier.
-            { subcarrier_index: (f, t_stft, Zxx_dB, motion_score) }
-        aggregated_motion_score (float): Aggregate score from all subcarriers.
-        """
-        subcarrier_results = {}
-        aggregated_motion_score = 0.0
-        total_subcarriers = len(frames[0]["CSI"])
-        valid_subcarriers = 0
-
-        for subcarrier_index in range(total_subcarriers):
-            # Extract amplitude data for this subcarrier, ignoring zeros
-            amp_vals = [
-                entry["CSI"][subcarrier_index]
-                for entry in frames
-                if subcarrier_index < len(entry["CSI"]) and entry["CSI"][subcarrier_index] != 0
-            ]
-
-            if len(amp_vals) < 2:  # Skip subcarriers with insufficient valid data
-                print(f"[INFO] Skipping subcarrier {subcarrier_index} due to insufficient data.")
+    while not stop_event.wait(interval):
+        for i, device in enumerate(device_ids):
+            with input_lock:
+                count, width, total = shared["frames"][i]
+                if count < 2:
+                    continue
+                csi_frames = shared["csi"][i, :count, :width].copy()
+                csi_timestamps = shared["timestamps"][i, :count].copy()
+
+            try:
+                sampling_rate = analyzer.calculate_sampling_rate(csi_timestamps)
+                subcarrier_results, aggregated_motion_score = analyzer.doppler_analysis_all_subcarriers(
+                    frames=csi_frames,
+                    sampling_rate=sampling_rate,
+                    device=device,
+                    first_index=total - count
+                )
+            except ValueError as e:
+                print(f"[WARN] Device {device}: {e}")
                 continue
 
-            amp_vals = np.array(amp_vals, dtype=np.float32)
-            noverlap = min(min(len(amp_vals),64) // 2, 32)  # Ensure noverlap is always less than nperseg
+            with output_lock:
+                shared["motion"][i] = aggregated_motion_score
+                if not subcarrier_results:
+                    shared["shape"][i] = (1, 0, 0, 0)
+                    continue
 
-            # Perform STFT
-            f, t_stft, Zxx = signal.stft(
-                amp_vals,
-                fs=sampling_rate,
-                nperseg=min(len(amp_vals), 64),
-                noverlap=noverlap
-            )
+                Zxx_dB = subcarrier_results["Zxx_dB"]
+                n_sub, n_bins, n_times = Zxx_dB.shape
+                shared["Zxx_dB"][i, :n_sub, :n_bins, :n_times] = Zxx_dB
+                shared["scores"][i, :n_sub] = subcarrier_results["scores"]
+                shared["subcarriers"][i, :n_sub] = subcarrier_results["subcarriers"]
+                shared["f"][i, :n_bins] = subcarrier_results["f"]
+                shared["t"][i, :n_times] = subcarrier_results["t"]
+                shared["shape"][i] = (1, n_sub, n_bins, n_times)
 
-            # Convert magnitude to dB
-            Zxx_dB = 20 * np.log10(np.abs(Zxx) + 1e-6)
+        with seq.get_lock():
+            seq.value += 1
 
-            # Compute motion score for this subcarrier
-            if Zxx_dB.shape[1] > 0:
-                motion_score = float(np.mean(Zxx_dB[:, -1]))
-            else:
-                motion_score = 0.0
 
-            # Store individual subcarrier results
-            subcarrier_results[subcarrier_index] = (f, t_stft, Zxx_dB, motion_score)
+class RadarAnalyzerProcess:
+    """
+    Drop-in alternative to RadarAnalyzer (start/stop/join, motion_scores,
+    subcarrier_data) that runs the analysis in a separate process, so it
+    never holds the GIL the GUI thread needs.
 
-            # Aggregate motion score
-            aggregated_motion_score += motion_score
-            valid_subcarriers += 1
+    DeviceStatus stays in this process: a feeder thread copies each device's
+    CSI history into shared memory every interval, the worker analyses it and
+    writes spectrograms and scores into a second set of shared arrays. Both
+    sides only hold the matching lock while copying.
 
-        # Normalize the aggregated motion score
-        if valid_subcarriers > 0:
-            aggregated_motion_score /= valid_subcarriers
-        else:
-            print("[WARN] No valid subcarriers with data to process.")
-            aggregated_motion_score = 0.0
+    The shared arrays are sized for the devices given here, so the device set
+    is fixed: device_coords is a read-only copy.
+    """
 
-        return subcarrier_results, aggregated_motion_score
+    def __init__(self, device_status, device_coords, interval=1.0, name="RadarAnalyzer"):
+        self.device_status = device_status
+        self.device_coords = MappingProxyType(dict(device_coords))
+        self.interval = interval
+        self.device_ids = list(device_coords.keys())
+        n_devices = len(self.device_ids)
+
+        self._blocks = {
+            name: SharedMemory(create=True, size=max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize))
+            for name, shape, dtype in _shared_layout(n_devices)
+        }
+        self._shared = _shared_arrays(self._blocks, n_devices)
+        for array in self._shared.values():
+            array.fill(0)
+
+        # Spawn rather than fork: by now the acquisition and consumer threads are
+        # running, and a forked child could inherit one of their locks held
+        ctx = multiprocessing.get_context("spawn")
+        self._input_lock = ctx.Lock()
+        self._output_lock = ctx.Lock()
+        self._seq = ctx.Value("q", 0)  # Bumped by the worker after every pass
+        self._stop_event = ctx.Event()
+
+        self._process = ctx.Process(
+            target=_analysis_worker,
+            args=(self.device_ids, self._blocks, self._input_lock, self._output_lock,
+                  self._seq, self._stop_event, interval),
+            name=name,
+            daemon=True
+        )
+        self._feeder = threading.Thread(target=self._feed, name=f"{name}Feeder", daemon=True)
+
+        # Last results read out of shared memory, refreshed when _seq moves
+        self._read_seq = -1
+        self._subcarrier_data = {}
+        self._motion_scores = {}
+
+    def _feed(self):
+        """Copy the CSI history of every tracked device into shared memory."""
+        shared = self._shared
+        while not self._stop_event.wait(self.interval):
+            snapshot = self.device_status.get_all_devices()
+            with self._input_lock:
+                for i, device in enumerate(self.device_ids):
+                    if device not in snapshot:
+                        continue
+                    csi = snapshot[device]["CSI"]
+                    count, width = csi.shape
+                    shared["csi"][i, :count, :width] = csi
+                    shared["timestamps"][i, :count] = snapshot[device]["CSITimestamps"]
+                    shared["frames"][i] = (count, width, snapshot[device]["CSITotal"])
+
+    def _refresh(self):
+        """Copy the latest published results out of shared memory, if there are new ones."""
+        if self._seq.value == self._read_seq:
+            return
+
+        shared = self._shared
+        subcarrier_data, motion_scores = {}, {}
+        with self._output_lock:
+            self._read_seq = self._seq.value
+            for i, device in enumerate(self.device_ids):
+                analysed, n_sub, n_bins, n_times = shared["shape"][i]
+                if not analysed:
+                    continue
+                motion_scores[device] = float(shared["motion"][i])
+                if n_sub == 0:
+                    subcarrier_data[device] = {}
+                    continue
+                subcarrier_data[device] = {
+                    "f": shared["f"][i, :n_bins].copy(),
+                    "t": shared["t"][i, :n_times].copy(),
+                    "Zxx_dB": shared["Zxx_dB"][i, :n_sub, :n_bins, :n_times].copy(),
+                    "scores": shared["scores"][i, :n_sub].copy(),
+                    "subcarriers": shared["subcarriers"][i, :n_sub].copy()
+                }
+
+        self._subcarrier_data, self._motion_scores = subcarrier_data, motion_scores
+
+    @property
+    def subcarrier_data(self):
+        self._refresh()
+        return self._subcarrier_data
+
+    @property
+    def motion_scores(self):
+        self._refresh()
+        return self._motion_scores
+
+    def start(self):
+        self._process.start()
+        self._feeder.start()
+
+    def stop(self):
+        """Signal the feeder and the worker process to stop."""
+        self._stop_event.set()
 
+    def join(self, timeout=None):
+        """Wait for both to finish, then release the shared memory."""
+        self._feeder.join(timeout)
+        self._process.join(timeout)
+        if self._process.is_alive():
+            self._process.terminate()
+            self._process.join()
 
+        self._shared = None
+        for block in self._blocks.values():
+            block.close()
+            block.unlink()